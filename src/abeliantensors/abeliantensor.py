@@ -4,6 +4,7 @@ import warnings
 import itertools as itt
 import functools as fct
 import operator as opr
+import scipy.linalg as spla
 import scipy.sparse.linalg as spsla
 from copy import deepcopy
 from .tensorcommon import TensorCommon
@@ -762,9 +763,13 @@ class AbelianTensor(TensorCommon):
     # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
     # To and from numpy arrays
 
-    def to_ndarray(self):
+    def to_ndarray(self, out=None):
         """Return a corresponding numpy array.
 
+        If `out` is provided, it must be an ndarray of the right (flattened)
+        shape. It is filled with the result and returned, instead of
+        allocating a new array.
+
         The order of the blocks in the result is such that along every index
         the blocks are organized according to rising `qnum`. Note that this
         means that the end result changes if the directions of some of the
@@ -782,7 +787,12 @@ class AbelianTensor(TensorCommon):
         """
         # Create an ndarray of the right shape, filled with self.defval.
         ndshape = type(self).flatten_shape(self.shape)
-        res = np.full(ndshape, self.defval, dtype=self.dtype)
+        if out is None:
+            res = np.full(ndshape, self.defval, dtype=self.dtype)
+        else:
+            assert list(out.shape) == list(ndshape)
+            res = out
+            res.fill(self.defval)
         if 0 in ndshape:
             return res
         shp, qhp = type(self)._sorted_shape_qhape(tensor=self)
@@ -2038,6 +2048,7 @@ class AbelianTensor(TensorCommon):
         degeneracy_eps=1e-6,
         sparse=False,
         trunc_err_func=None,
+        svd_driver=None,
     ):
         """Singular value decompose a matrix.
 
@@ -2068,6 +2079,12 @@ class AbelianTensor(TensorCommon):
         if the truncation error so allows. Thus ``max(chis)`` should be much
         smaller than the full size of the matrix, if `sparse` is True.
 
+        If `svd_driver` is given, the dense SVD of each sector is done with
+        `scipy.linalg.svd` using that LAPACK driver, e.g. ``"gesvd"``, which
+        can be faster than the default divide-and-conquer algorithm for the
+        small matrices that individual sectors often are. By default
+        `numpy.linalg.svd` is used.
+
         The method returns the tuple ``U, S, V, rel_err``, where `S` is a
         non-invariant vector and `U` and `V` are unitary matrices. They are
         such that ``U.diag(S).V == self``, where the equality is appromixate if
@@ -2113,6 +2130,10 @@ class AbelianTensor(TensorCommon):
                     u = u[:, order]
                     s = s[order]
                     v = v[order, :]
+                elif svd_driver is not None:
+                    u, s, v = spla.svd(
+                        v, full_matrices=False, lapack_driver=svd_driver
+                    )
                 else:
                     u, s, v = np.linalg.svd(v, full_matrices=False)
             svd = (s, u, v)
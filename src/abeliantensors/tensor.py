@@ -1,6 +1,7 @@
 import numpy as np
 import operator as opr
 import functools as fct
+import scipy.linalg as spla
 import scipy.sparse.linalg as spsla
 import warnings
 from .tensorcommon import TensorCommon
@@ -80,8 +81,16 @@ class Tensor(TensorCommon, np.ndarray):
     # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
     # To and from numpy arrays
 
-    def to_ndarray(self, **kwargs):
-        """Return the corresponding NumPy array, as a copy."""
+    def to_ndarray(self, out=None, **kwargs):
+        """Return the corresponding NumPy array, as a copy.
+
+        If `out` is provided, it must be an ndarray of the right shape. The
+        elements are copied into it and it is returned, instead of allocating
+        a new array.
+        """
+        if out is not None:
+            np.copyto(out, self)
+            return out
         return np.asarray(self.copy())
 
     @classmethod
@@ -536,6 +545,7 @@ class Tensor(TensorCommon, np.ndarray):
         degeneracy_eps=1e-6,
         sparse=False,
         trunc_err_func=None,
+        svd_driver=None,
     ):
         """Singular value decompose a matrix.
 
@@ -564,6 +574,11 @@ class Tensor(TensorCommon, np.ndarray):
         if the truncation error so allows. Thus ``max(chis)`` should be much
         smaller than the full size of the matrix, if `sparse` is True.
 
+        If `svd_driver` is given, the dense SVD is done with
+        `scipy.linalg.svd` using that LAPACK driver, e.g. ``"gesvd"``, which
+        can be faster than the default divide-and-conquer algorithm for small
+        matrices. By default `numpy.linalg.svd` is used.
+
         The return value is``U, S, V, rel_err``, where `S` is a vector and `U`
         and `V` are unitary matrices. They are such that ``U.diag(S).V ==
         self``, where the equality is appromixate if there is truncation.
@@ -583,7 +598,12 @@ class Tensor(TensorCommon, np.ndarray):
             U, S, V = spsla.svds(self, k=maxchi, return_singular_vectors=True)
             norm_sq = self.norm_sq()
         else:
-            U, S, V = np.linalg.svd(self, full_matrices=False)
+            if svd_driver is not None:
+                U, S, V = spla.svd(
+                    self, full_matrices=False, lapack_driver=svd_driver
+                )
+            else:
+                U, S, V = np.linalg.svd(self, full_matrices=False)
             norm_sq = None
         S = Tensor.from_ndarray(S)
         # Truncate, if truncation dimensions are given.
@@ -125,6 +125,10 @@ class TensorCommon:
         `dirs` of the tensor after all the transposing but before reshaping is
         returned as well.
         """
+        # Normalize the index collections to lists, so that any iterable, for
+        # instance an ndarray, can be passed in.
+        left_inds = list(left_inds)
+        right_inds = list(right_inds)
         if dirs is None:
             if len(left_inds) > 0 and len(right_inds) > 0:
                 dirs = [1, -1]
@@ -1,9 +1,17 @@
 """Define utility functions and set up pytest fixtures for the test suite."""
+import os
 import pytest
 import numpy as np
 from abeliantensors import Tensor
 from abeliantensors import TensorZ2, TensorU1, TensorZ3
 
+# A shared random number generator for drawing random test data. The new-style
+# `Generator` is faster per call than the legacy `np.random.*` functions. The
+# initial state is irrelevant: the `iter_num` fixture reseeds the generator by
+# iteration number before every test, which is what makes each iteration
+# reproducible, regardless of which worker runs it or in what order.
+rng = np.random.default_rng()
+
 
 @pytest.fixture(scope="module")
 def tensorclass(request):
@@ -25,8 +33,9 @@ def pytest_addoption(parser):
     parser.addoption(
         "--n_iters",
         type=int,
-        default=100,
-        help="Number of times to run each test on new random input.",
+        default=int(os.environ.get("ABELIAN_TEST_ITERS", "25")),
+        help="Number of times to run each test on new random input. "
+        "Defaults to the ABELIAN_TEST_ITERS environment variable.",
     )
 
 
@@ -60,8 +69,22 @@ def pytest_generate_tests(metafunc):
     if "tensorclass" in metafunc.fixturenames:
         metafunc.parametrize("tensorclass", tensorclasses, indirect=True)
     n_iters = metafunc.config.getoption("n_iters")
-    if "n_iters" in metafunc.fixturenames:
-        metafunc.parametrize("n_iters", [n_iters])
+    if "iter_num" in metafunc.fixturenames:
+        metafunc.parametrize("iter_num", range(n_iters), indirect=True)
+
+
+@pytest.fixture
+def iter_num(request):
+    """Seed the shared random number generator deterministically for this
+    iteration, and return the iteration number.
+
+    Tests are parametrized over `iter_num` instead of looping over iterations
+    internally, so that a failure reports the iteration that triggered it, and
+    so that pytest-xdist can distribute iterations across cores. Seeding by
+    the iteration number keeps each iteration reproducible and distinct.
+    """
+    rng.bit_generator.state = np.random.PCG64(request.param).state
+    return request.param
 
 
 @pytest.fixture
@@ -90,22 +113,22 @@ def rshape(n_qnums):
         the bounds `nlow`, `nhigh`, `chilow`, and `chihigh`.
         """
         if n is None:
-            n = np.random.randint(nlow, high=nhigh)
+            n = rng.integers(nlow, nhigh)
         shape = []
         for i in range(n):
             if n_qnums is None:
-                dim_dim = np.random.randint(low=1, high=5)
+                dim_dim = rng.integers(1, 5)
             else:
                 dim_dim = n_qnums
             if chi is None:
                 dim = []
                 for _ in range(dim_dim):
-                    dim.append(np.random.randint(0, high=chihigh))
+                    dim.append(rng.integers(0, chihigh))
             else:
                 dim = [chi] * dim_dim
             s = sum(dim)
             if s < chilow:
-                j = np.random.randint(0, len(dim))
+                j = rng.integers(0, len(dim))
                 dim[j] += chilow - s
             shape.append(dim)
         return shape
@@ -137,7 +160,7 @@ def rqhape(n_qnums):
         possible_qnums = range(qlow, qhigh + 1)
         try:
             qhape = [
-                list(np.random.choice(possible_qnums, len(dim), replace=False))
+                list(rng.choice(possible_qnums, len(dim), replace=False))
                 for dim in shape
             ]
         except TypeError:
@@ -153,6 +176,11 @@ def rdirs():
     """Return a function that generates random `dirs`s for symmetric tensors.
     """
 
+    # Tests often ask for several dirs of the same length, so draw a few at a
+    # time and serve them from a buffer, keyed by length. The fixture is
+    # function-scoped, so the buffers never outlive one test.
+    buffers = {}
+
     def _rdirs(shape=None, length=None):
         """Return a random `dirs` for a symmetric tensor.
 
@@ -161,9 +189,11 @@ def rdirs():
         """
         if shape is not None:
             length = len(shape)
-        dirs = np.random.randint(low=0, high=2, size=length)
-        dirs = list(2 * dirs - 1)
-        return dirs
+        buffer = buffers.get(length)
+        if not buffer:
+            buffer = list(2 * rng.integers(0, 2, size=(4, length)) - 1)
+            buffers[length] = buffer
+        return list(buffer.pop())
 
     return _rdirs
 
@@ -173,11 +203,19 @@ def rcharge():
     """Return a function that generates random charges for symmetric tensors.
     """
 
+    # As in rdirs, batch the draws and serve them from a buffer, keyed by the
+    # bounds of the distribution.
+    buffers = {}
+
     def _rcharge(low=0, high=4):
         """Return a random charge for a symmetric tensor, i.e. a random integer
         between `low` and `high`, inclusive.
         """
-        return np.random.randint(low=low, high=high)
+        buffer = buffers.get((low, high))
+        if not buffer:
+            buffer = list(rng.integers(low, high, size=4))
+            buffers[(low, high)] = buffer
+        return buffer.pop()
 
     return _rcharge
 